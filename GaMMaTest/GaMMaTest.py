@@ -134,7 +134,8 @@ with Timer() as run_gamma_seconds:
     picks=picks.drop(['nothing'], axis=1)
     picks['loc']=['--']*len(picks) 
 
-    picks["timestamp"] = picks["datetime"].apply(lambda x: datetime.timestamp(datetime.strptime(x, '%Y-%m-%dT%H:%M:%S.%f')))
+    picks_datetime = pd.to_datetime(picks["datetime"], format='%Y-%m-%dT%H:%M:%S.%f') #parse the pick times once, reused below
+    picks["timestamp"] = picks_datetime.apply(datetime.timestamp)
     picks['pickwidth']=[0]*len(picks) 
     now = datetime.now()
     ts = datetime.timestamp(now)
@@ -149,16 +150,14 @@ with Timer() as run_gamma_seconds:
     picks=picks.sort_values(by = ['id', 'type'], ascending = [True, True])
     picks['timestamp_older']=picks['timestamp'] 
 
-    picks["time_idx"] = picks["datetime"].apply(lambda x: datetime.strptime(x, '%Y-%m-%dT%H:%M:%S.%f').strftime("%Y-%m-%dT%H"))
-    picks["timestamp"] = picks["datetime"].apply(lambda x: datetime.strptime(x, '%Y-%m-%dT%H:%M:%S.%f').strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]) 
+    picks["time_idx"] = picks_datetime.dt.strftime("%Y-%m-%dT%H")
+    picks["timestamp"] = picks_datetime.dt.floor("ms")
     picks=picks.drop(columns=['sta', 'net','inst','loc','datetime','pickwidth'])
 
     ## if use amplitude
     if config["use_amplitude"]:
         picks = picks[picks["amp"] != 0]
 
-    picks["timestamp"] = picks["timestamp"].apply(lambda x: datetime.strptime(x, "%Y-%m-%dT%H:%M:%S.%f"))
-
     unique_picks=list(set(picks['id'].tolist()))
 
     stations = stations[stations['id'].isin(unique_picks)] 
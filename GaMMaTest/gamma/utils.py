@@ -12,17 +12,17 @@ from_seconds = lambda t: pd.Timestamp.utcfromtimestamp(t).strftime(
 )[:-3]
 
 def convert_picks_csv(picks, stations, config):
-    t = picks["timestamp"].apply(lambda x: x.timestamp()).to_numpy()
+    t = picks["timestamp"].values.astype("datetime64[us]").astype(np.int64) / 1e6
     if config["use_amplitude"]:
-        a = picks["amp"].apply(lambda x: np.log10(x * 1e2)).to_numpy()
+        a = np.log10(picks["amp"].to_numpy() * 1e2)
         data = np.stack([t, a]).T
     else:
         data = t[:, np.newaxis]  
     meta = stations.merge(picks["id"], how="right", on="id")
     locs = meta[config["dims"]].to_numpy()
-    phase_type = picks["type"].apply(lambda x: x.lower()).to_numpy()
+    phase_type = picks["type"].str.lower().to_numpy()
     phase_weight = picks["prob"].to_numpy()[:, np.newaxis]
-    pick_station_id = picks.apply(lambda x: x.id + "_" + x.type, axis=1).to_numpy()
+    pick_station_id = (picks["id"] + "_" + picks["type"]).to_numpy()
     nan_idx = meta.isnull().any(axis=1)
     return (
         data[~nan_idx],
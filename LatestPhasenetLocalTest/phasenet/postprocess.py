@@ -2,7 +2,7 @@ import json
 import logging
 import os
 from collections import namedtuple
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -65,6 +65,22 @@ from detect_peaks import detect_peaks
 #     return picks
 
 
+def detect_phase_peaks(prob, mph, mpd):
+    """detect_peaks(prob, mph=mph, mpd=mpd), skipping traces that never reach mph.
+    Args:
+        prob: [Nt] phase probability
+        mph: minimum peak height
+        mpd: minimum peak distance (samples)
+
+    Returns:
+        idxs, probs: peak indices and heights
+    """
+    ## most traces are noise: skip the peak search when nothing reaches mph
+    if np.max(prob) < mph:
+        return np.zeros(0, dtype=np.intp), np.zeros(0)
+    return detect_peaks(prob, mph=mph, mpd=mpd, show=False)
+
+
 def extract_picks(
     preds,
     file_names=None,
@@ -126,6 +142,11 @@ def extract_picks(
 
         file_name = file_names[i]
         begin_time = datetime.fromisoformat(begin_times[i])
+        begin_time_iso = begin_time.isoformat(timespec="milliseconds")
+        ## "YYYY-MM-DDTHH:MM:SS.mmm" is 23 characters; whatever follows is the UTC offset (e.g. "+00:00"), if any,
+        ## which calc_timestamp does not keep, so it is appended back to each pick time
+        begin_time_naive = begin_time.replace(tzinfo=None)
+        utc_offset = begin_time_iso[23:]
 
         for j in range(Ns):
             if (station_ids is None) or (len(station_ids[i]) == 0):
@@ -136,15 +157,17 @@ def extract_picks(
             if (waveforms is not None) and use_amplitude:
                 amp = np.max(np.abs(waveforms[i, :, j, :]), axis=-1)  ## amplitude over three channelspy
             for k in range(Nc - 1):  # 0-th channel noise
-                idxs, probs = detect_peaks(preds[i, :, j, k + 1], mph=mph[phases[k]], mpd=mpd, show=False)
-                for l, (phase_index, phase_prob) in enumerate(zip(idxs, probs)):
-                    pick_time = begin_time + timedelta(seconds=phase_index * dt)
+                idxs, probs = detect_phase_peaks(preds[i, :, j, k + 1], mph=mph[phases[k]], mpd=mpd)
+                if len(idxs) == 0:
+                    continue
+                phase_times = calc_timestamp(begin_time_naive, idxs * dt)
+                for l, (phase_index, phase_prob, phase_time) in enumerate(zip(idxs.tolist(), probs.tolist(), phase_times)):
                     pick = {
                         "file_name": file_name,
                         "station_id": station_id,
-                        "begin_time": begin_time.isoformat(timespec="milliseconds"),
-                        "phase_index": int(phase_index),
-                        "phase_time": pick_time.isoformat(timespec="milliseconds"),
+                        "begin_time": begin_time_iso,
+                        "phase_index": phase_index,
+                        "phase_time": phase_time + utc_offset,
                         "phase_score": round(phase_prob, 3),
                         "phase_type": phases[k],
                         "dt": dt,
@@ -241,8 +264,18 @@ def save_picks(picks, output_dir, amps=None, fname=None):
 
 
 def calc_timestamp(timestamp, sec):
-    timestamp = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f") + timedelta(seconds=sec)
-    return timestamp.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+    """Add seconds to a timestamp.
+    Args:
+        timestamp: ISO string ("%Y-%m-%dT%H:%M:%S.%f") or naive datetime
+        sec: offset in seconds, scalar or array
+
+    Returns:
+        naive wall-clock time(s) as "%Y-%m-%dT%H:%M:%S.%f" to milliseconds, a str or a list of str.
+        A UTC offset in timestamp is not kept (numpy converts to UTC with a warning); callers with
+        tz-aware begin times pass the naive time and append the offset themselves, as extract_picks does.
+    """
+    offset = np.round(np.asarray(sec) * 1e6).astype(np.int64).astype("timedelta64[us]")
+    return np.datetime_as_string(np.datetime64(timestamp, "us") + offset, unit="ms").tolist()
 
 
 def save_picks_json(picks, output_dir, dt=0.01, amps=None, fname=None):
@@ -253,21 +286,23 @@ def save_picks_json(picks, output_dir, dt=0.01, amps=None, fname=None):
     if amps is None:
         for pick in picks:
             for idxs, probs in zip(pick.p_idx, pick.p_prob):
-                for idx, prob in zip(idxs, probs):
+                timestamps = calc_timestamp(pick.t0, np.asarray(idxs, dtype=float) * dt)
+                for prob, timestamp in zip(probs, timestamps):
                     picks_.append(
                         {
                             "id": pick.station_id,
-                            "timestamp": calc_timestamp(pick.t0, float(idx) * dt),
+                            "timestamp": timestamp,
                             "prob": prob.astype(float),
                             "type": "p",
                         }
                     )
             for idxs, probs in zip(pick.s_idx, pick.s_prob):
-                for idx, prob in zip(idxs, probs):
+                timestamps = calc_timestamp(pick.t0, np.asarray(idxs, dtype=float) * dt)
+                for prob, timestamp in zip(probs, timestamps):
                     picks_.append(
                         {
                             "id": pick.station_id,
-                            "timestamp": calc_timestamp(pick.t0, float(idx) * dt),
+                            "timestamp": timestamp,
                             "prob": prob.astype(float),
                             "type": "s",
                         }
@@ -275,22 +310,24 @@ def save_picks_json(picks, output_dir, dt=0.01, amps=None, fname=None):
     else:
         for pick, amplitude in zip(picks, amps):
             for idxs, probs, amps in zip(pick.p_idx, pick.p_prob, amplitude.p_amp):
-                for idx, prob, amp in zip(idxs, probs, amps):
+                timestamps = calc_timestamp(pick.t0, np.asarray(idxs, dtype=float) * dt)
+                for prob, amp, timestamp in zip(probs, amps, timestamps):
                     picks_.append(
                         {
                             "id": pick.station_id,
-                            "timestamp": calc_timestamp(pick.t0, float(idx) * dt),
+                            "timestamp": timestamp,
                             "prob": prob.astype(float),
                             "amp": amp.astype(float),
                             "type": "p",
                         }
                     )
             for idxs, probs, amps in zip(pick.s_idx, pick.s_prob, amplitude.s_amp):
-                for idx, prob, amp in zip(idxs, probs, amps):
+                timestamps = calc_timestamp(pick.t0, np.asarray(idxs, dtype=float) * dt)
+                for prob, amp, timestamp in zip(probs, amps, timestamps):
                     picks_.append(
                         {
                             "id": pick.station_id,
-                            "timestamp": calc_timestamp(pick.t0, float(idx) * dt),
+                            "timestamp": timestamp,
                             "prob": prob.astype(float),
                             "amp": amp.astype(float),
                             "type": "s",
@@ -321,10 +358,16 @@ def calc_metrics(nTP, nP, nT):
     nTP: true positive
     nP: number of positive picks
     nT: number of true picks
+
+    Accepts scalars or arrays (e.g. counts over a threshold sweep); zero counts give 0 instead of nan.
     """
-    precision = nTP / nP
-    recall = nTP / nT
-    f1 = 2 * precision * recall / (precision + recall)
+    nTP, nP, nT = np.broadcast_arrays(*[np.asarray(x, dtype=np.float64) for x in (nTP, nP, nT)])
+    precision = np.divide(nTP, nP, out=np.zeros(nTP.shape), where=nP > 0)
+    recall = np.divide(nTP, nT, out=np.zeros(nTP.shape), where=nT > 0)
+    denom = precision + recall
+    f1 = np.divide(2 * precision * recall, denom, out=np.zeros(nTP.shape), where=denom > 0)
+    if f1.ndim == 0:
+        return [precision.item(), recall.item(), f1.item()]
     return [precision, recall, f1]
 
 
@@ -6,6 +6,7 @@ import numpy as np
 import os
 from data_reader import DataConfig
 from detect_peaks import detect_peaks
+from postprocess import calc_metrics
 import logging
 
 class EMA(object):
@@ -194,10 +195,7 @@ def metrics(TP, nP, nT):
   nP: number of positive picks
   nT: number of true picks
   '''
-  precision = TP / nP
-  recall = TP / nT
-  F1 = 2* precision * recall / (precision + recall)
-  return [precision, recall, F1]
+  return calc_metrics(TP, nP, nT)
 
 def correct_picks(picks, true_p, true_s, tol):
   dt = DataConfig().dt